@@ -69,6 +69,23 @@ class Settings(BaseSettings):
         default=25,
         description="Max items to feed into the synthesis prompt",
     )
+    max_concurrency: int = Field(
+        default=8,
+        description="Max concurrent in-flight LLM calls during triage",
+    )
+    triage_rpm: int = Field(
+        default=50,
+        description="Requests/minute budget for triage calls (match account tier)",
+    )
+    triage_tpm: int = Field(
+        default=40000,
+        description="Estimated input tokens/minute budget for triage calls",
+    )
+    use_batch_api: bool = Field(
+        default=False,
+        description="Triage via the Message Batches API (50% cheaper, minutes "
+        "of added latency) instead of concurrent real-time calls",
+    )
 
     # ── Paths (derived, not from env) ────────────────────────────────────
     credentials_path: Path = Field(
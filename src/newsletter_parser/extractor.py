@@ -2,37 +2,70 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import logging
+import os
 import re
+import time
 from dataclasses import dataclass, field
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
 
-import anthropic
 import httpx
 import tiktoken
-from bs4 import BeautifulSoup
+from selectolax.parser import HTMLParser
 
+from newsletter_parser import llm
 from newsletter_parser.config import Settings
 from newsletter_parser.prompts import CHUNK_SUMMARY_SYSTEM, CHUNK_SUMMARY_USER
 from newsletter_parser.triage import TriageResult
 
 logger = logging.getLogger(__name__)
 
-# Invisible Unicode characters that pollute extracted text
-_INVISIBLE_UNICODE = re.compile(
-    r"[\u200b\u200c\u200d\u200e\u200f"   # zero-width spaces / joiners / direction marks
-    r"\u00ad"                              # soft hyphen
-    r"\u2060\u2061\u2062\u2063\u2064"      # invisible operators
-    r"\ufeff"                              # BOM / zero-width no-break space
-    r"\u00a0"                              # non-breaking space → regular space
-    r"\u034f\u061c\u115f\u1160"            # misc invisible
-    r"\u17b4\u17b5\uffa0]",
+# Worker threads for the prepare phase (dominated by blocking link fetches)
+_PREPARE_WORKERS = 16
+
+# Concurrent in-flight chunk-summarization requests (Anthropic rate limits)
+_CHUNK_CONCURRENCY = 8
+
+# Chunk summarization: use the Message Batches API at or above this many
+# chunk requests; poll interval while a batch job is processing
+_BATCH_API_MIN_REQUESTS = 4
+_BATCH_POLL_SECONDS = 5
+
+# Link fetching: stop downloading after this many bytes (we only keep ~8k
+# chars of article text), and skip pages that declare themselves huge
+_MAX_DOWNLOAD_BYTES = 64 * 1024
+_MAX_PAGE_BYTES = 5 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=4)
+def _get_encoder(name: str = "cl100k_base") -> tiktoken.Encoding:
+    """Return a cached tiktoken encoding (construction costs tens of ms)."""
+    return tiktoken.get_encoding(name)
+
+
+# Invisible Unicode characters that pollute extracted text; str.translate
+# deletes them in a single C-speed pass (vs. a regex scan per call)
+_INVISIBLE_TABLE = dict.fromkeys(
+    [
+        0x200B, 0x200C, 0x200D, 0x200E, 0x200F,  # zero-width spaces / joiners / direction marks
+        0x00AD,                                  # soft hyphen
+        0x2060, 0x2061, 0x2062, 0x2063, 0x2064,  # invisible operators
+        0xFEFF,                                  # BOM / zero-width no-break space
+        0x034F, 0x061C, 0x115F, 0x1160,          # misc invisible
+        0x17B4, 0x17B5, 0xFFA0,
+    ]
 )
+_INVISIBLE_TABLE[0x00A0] = 0x20  # non-breaking space -> regular space
+
+# Collapse 3+ consecutive newlines down to a paragraph break
+_EXCESS_NEWLINES = re.compile(r"\n{3,}")
 
 
 def _strip_invisible_unicode(text: str) -> str:
     """Remove invisible Unicode characters that clutter extracted content."""
-    return _INVISIBLE_UNICODE.sub("", text)
+    return text.translate(_INVISIBLE_TABLE)
 
 
 # URL patterns to skip during link scoring
@@ -50,6 +83,12 @@ _SKIP_DOMAINS = {
     "trk.klclick", "t.dripemail2", "links.beehiiv",
 }
 
+# Single alternation over the skip domains so rejection is one regex scan
+# on the raw URL instead of a Python loop over the parsed netloc
+_SKIP_DOMAINS_RE = re.compile(
+    "|".join(map(re.escape, sorted(_SKIP_DOMAINS))), re.IGNORECASE
+)
+
 
 @dataclass
 class ExtractedItem:
@@ -60,7 +99,6 @@ class ExtractedItem:
     category: str
     summary_text: str
     link_url: str | None = None
-    full_content: str = ""
     email_id: str = ""
     email_subject: str = ""
 
@@ -71,96 +109,181 @@ def extract_items(
     """Process triaged emails: strip HTML, follow links for high-relevance items,
     chunk and summarize if needed.
     """
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-    enc = tiktoken.get_encoding("cl100k_base")
-    items: list[ExtractedItem] = []
-
-    for result in triaged:
-        try:
-            item = _extract_single(result, client, enc, settings)
-            items.append(item)
-        except Exception:
-            logger.exception(
-                "Extraction failed for '%s'; using snippet fallback",
-                result.email.subject,
+    enc = _get_encoder()
+    _LINK_CACHE.clear()
+
+    # Phases 1+2 run as one bounded pipeline: HTML stripping happens on
+    # worker threads while each email's article link starts downloading the
+    # moment its prepare completes — no barrier between the stages. Order is
+    # preserved by gather; failures become snippet fallbacks so one bad
+    # email can't sink the batch.
+    prepared, link_texts = asyncio.run(_prepare_and_fetch(triaged))
+
+    # Phase 3: combine body + linked article, then tokenize all combined
+    # bodies in one batched call — amortizes the Python↔Rust boundary
+    # crossing instead of encoding per email.
+    combined_entries: list[tuple[str, str | None] | None] = []
+    for p in prepared:
+        if p is None:
+            combined_entries.append(None)
+            continue
+        body, link_url = p
+        link_content = link_texts.get(link_url, "") if link_url else ""
+        combined = body
+        if link_content:
+            combined += "\n\n--- Linked Article ---\n\n" + link_content
+        combined_entries.append((combined, link_url))
+
+    combined_texts = [e[0] for e in combined_entries if e is not None]
+    token_lists = enc.encode_ordinary_batch(
+        combined_texts, num_threads=os.cpu_count() or 1
+    )
+    tokens_iter = iter(token_lists)
+    token_counts = [
+        len(next(tokens_iter)) if e is not None else 0 for e in combined_entries
+    ]
+
+    # Phase 4: split every over-budget email into chunks and summarize all
+    # chunks across all emails in one pass.
+    to_chunk = [
+        i
+        for i, entry in enumerate(combined_entries)
+        if entry is not None and token_counts[i] > settings.token_budget
+    ]
+    chunked_summaries: dict[int, str] = {}
+    if to_chunk:
+        chunk_lists = [
+            _split_chunks(
+                combined_entries[i][0], token_counts[i], settings.token_budget
             )
-            items.append(
-                ExtractedItem(
-                    source_name=_source_name(result.email.sender),
-                    topics=result.topics,
-                    category=result.category,
-                    summary_text=result.email.snippet,
-                    email_id=result.email.id,
-                    email_subject=result.email.subject,
-                )
+            for i in to_chunk
+        ]
+        chunked_summaries = dict(zip(to_chunk, _summarize_all(chunk_lists, settings)))
+
+    # Phase 5: assemble items.
+    items: list[ExtractedItem] = []
+    for i, (result, entry) in enumerate(zip(triaged, combined_entries)):
+        if entry is None:
+            items.append(_fallback_item(result))
+            continue
+        combined, link_url = entry
+        email = result.email
+        items.append(
+            ExtractedItem(
+                source_name=_source_name(email.sender),
+                topics=result.topics,
+                category=result.category,
+                summary_text=chunked_summaries.get(i, combined),
+                link_url=link_url,
+                email_id=email.id,
+                email_subject=email.subject,
             )
+        )
 
     logger.info("Extracted %d items", len(items))
     return items
 
 
-def _extract_single(
-    result: TriageResult,
-    client: anthropic.Anthropic,
-    enc: tiktoken.Encoding,
-    settings: Settings,
-) -> ExtractedItem:
-    """Extract content from a single triaged email."""
+def _prepare_safe(result: TriageResult) -> tuple[str, str | None] | None:
+    """Thread-pool wrapper around :func:`_prepare`; returns None on failure."""
+    try:
+        return _prepare(result)
+    except Exception:
+        logger.exception(
+            "Extraction failed for '%s'; using snippet fallback",
+            result.email.subject,
+        )
+        return None
+
+
+async def _prepare_and_fetch(
+    triaged: list[TriageResult],
+) -> tuple[list[tuple[str, str | None] | None], dict[str, str]]:
+    """Prepare every email and fetch its article link in one overlapped pass.
+
+    Prepares run on threads behind a semaphore; as each finishes, a fetch
+    task for its (deduplicated, canonicalized) link is started on the shared
+    HTTP client, so downloads overlap the remaining prepares instead of
+    waiting for all of them.
+    """
+    sem = asyncio.Semaphore(_PREPARE_WORKERS)
+    fetch_tasks: dict[str, asyncio.Task[str]] = {}
+
+    async with _make_http_client() as http:
+
+        async def _one(result: TriageResult) -> tuple[str, str | None] | None:
+            async with sem:
+                p = await asyncio.to_thread(_prepare_safe, result)
+            if p is not None and p[1]:
+                canon = _canonical_url(p[1])
+                if canon not in _LINK_CACHE and canon not in fetch_tasks:
+                    fetch_tasks[canon] = asyncio.create_task(
+                        _fetch_one_safe(http, canon)
+                    )
+            return p
+
+        prepared = list(await asyncio.gather(*(_one(r) for r in triaged)))
+        if fetch_tasks:
+            texts = await asyncio.gather(*fetch_tasks.values())
+            _LINK_CACHE.update(zip(fetch_tasks.keys(), texts))
+
+    link_texts = {
+        p[1]: _LINK_CACHE.get(_canonical_url(p[1]), "")
+        for p in prepared
+        if p is not None and p[1]
+    }
+    return prepared, link_texts
+
+
+def _prepare(result: TriageResult) -> tuple[str, str | None]:
+    """Strip HTML and pick the primary link; returns (body_text, link_url)."""
     email = result.email
 
-    # 1. Strip HTML → plain text
-    body = _strip_html(email.body_html) if email.body_html else email.body_text
+    if not email.body_html:
+        # A survivor whose fetch_full failed still carries its metadata-only
+        # RawEmail with both bodies empty — fall back to the snippet like
+        # every other failure path instead of synthesizing from nothing
+        return email.body_text or email.snippet, None
 
-    # 2. For high-relevance items, attempt to follow the primary link
-    link_url: str | None = None
-    link_content: str = ""
+    # Parse the body once and share the tree: the link scan runs first (on
+    # the intact tree), then stripping mutates it down to plain text
+    tree = HTMLParser(email.body_html)
 
+    link_url: str | None = None
     if result.category == "high_relevance":
-        best_link = _find_best_link(email.body_html)
-        if best_link:
-            link_url = best_link
-            link_content = _fetch_link_content(best_link)
-
-    # 3. Combine content
-    combined = body
-    if link_content:
-        combined += "\n\n--- Linked Article ---\n\n" + link_content
-
-    # 4. Chunk and summarize if over budget
-    token_count = len(enc.encode(combined))
-    if token_count > settings.token_budget:
-        summary = _chunked_summarize(combined, client, enc, settings)
-    else:
-        summary = combined
+        link_url = _find_best_link(tree)
+
+    return _strip_html(tree), link_url
+
 
+def _fallback_item(result: TriageResult) -> ExtractedItem:
+    """Snippet-only item used when extraction or summarization fails."""
     return ExtractedItem(
-        source_name=_source_name(email.sender),
+        source_name=_source_name(result.email.sender),
         topics=result.topics,
         category=result.category,
-        summary_text=summary,
-        link_url=link_url,
-        full_content=combined,
-        email_id=email.id,
-        email_subject=email.subject,
+        summary_text=result.email.snippet,
+        email_id=result.email.id,
+        email_subject=result.email.subject,
     )
 
 
 # ── HTML Processing ──────────────────────────────────────────────────────────
 
 
-def _strip_html(html: str) -> str:
-    """Convert HTML email body to clean plain text."""
-    soup = BeautifulSoup(html, "lxml")
-
+def _strip_html(tree: HTMLParser) -> str:
+    """Convert a parsed HTML email body to clean plain text (mutates the tree)."""
     # Remove script, style, and head tags
-    for tag in soup(["script", "style", "head", "meta", "link"]):
-        tag.decompose()
+    tree.strip_tags(["script", "style", "head", "meta", "link"])
 
-    text = soup.get_text(separator="\n", strip=True)
+    node = tree.body or tree.root
+    if node is None:
+        return ""
+    text = node.text(separator="\n", strip=True)
     text = _strip_invisible_unicode(text)
 
     # Collapse excessive whitespace
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _EXCESS_NEWLINES.sub("\n\n", text)
     return text.strip()
 
 
@@ -176,44 +299,36 @@ def _source_name(sender: str) -> str:
 # ── Link Extraction & Scoring ────────────────────────────────────────────────
 
 
-def _find_best_link(html: str) -> str | None:
-    """Find the most relevant content link in an HTML email body."""
-    if not html:
-        return None
+def _find_best_link(tree: HTMLParser) -> str | None:
+    """Find the most relevant content link in a parsed HTML email body."""
+    best_score = 0.0
+    best_href: str | None = None
 
-    soup = BeautifulSoup(html, "lxml")
-    candidates: list[tuple[float, str]] = []
-
-    for a_tag in soup.find_all("a", href=True):
-        href = a_tag["href"].strip()
+    # Track the running best instead of materializing a candidate list —
+    # _score_link rejects the majority of newsletter links anyway
+    for a_tag in tree.css("a[href]"):
+        href = (a_tag.attributes.get("href") or "").strip()
         if not href.startswith(("http://", "https://")):
             continue
 
-        score = _score_link(href, a_tag.get_text(strip=True))
-        if score > 0:
-            candidates.append((score, href))
-
-    if not candidates:
-        return None
+        score = _score_link(href, a_tag.text(strip=True))
+        if score > best_score:
+            best_score = score
+            best_href = href
 
-    candidates.sort(key=lambda x: x[0], reverse=True)
-    return candidates[0][1]
+    return best_href
 
 
 def _score_link(url: str, anchor_text: str) -> float:
     """Score a link for content relevance (higher = better). Returns 0 to skip."""
-    # Skip known bad patterns
-    if _SKIP_PATTERNS.search(url):
+    # Skip known bad patterns / tracking domains before paying for urlparse —
+    # the majority of newsletter links are rejects
+    if _SKIP_PATTERNS.search(url) or _SKIP_DOMAINS_RE.search(url):
         return 0.0
 
     parsed = urlparse(url)
     domain = parsed.netloc.lower()
 
-    # Skip tracking / infrastructure domains
-    for skip in _SKIP_DOMAINS:
-        if skip in domain:
-            return 0.0
-
     score = 0.5  # base score
 
     # Boost links with meaningful anchor text (not "click here")
@@ -238,37 +353,124 @@ def _score_link(url: str, anchor_text: str) -> float:
 # ── Link Content Fetching ────────────────────────────────────────────────────
 
 
+# Per-run cache of fetched article text keyed by canonicalized URL — tech
+# roundups frequently link to the same popular article. Cleared at the start
+# of each extract_items call.
+_LINK_CACHE: dict[str, str] = {}
+
+# Query parameters that only carry tracking state, stripped for cache keys
+_TRACKING_PARAM_PREFIXES = ("utm_", "mc_", "mkt_tok")
+
+
+def _canonical_url(url: str) -> str:
+    """Strip tracking query params so URL variants share one cache entry."""
+    parsed = urlparse(url)
+    if not parsed.query:
+        return url
+    kept = [
+        param
+        for param in parsed.query.split("&")
+        if not param.startswith(_TRACKING_PARAM_PREFIXES)
+    ]
+    return urlunparse(parsed._replace(query="&".join(kept)))
+
+
+def _fetch_links(urls: list[str]) -> dict[str, str]:
+    """Fetch article text for all URLs concurrently; returns {url: text}.
+
+    Deduplicates against the per-run cache so each canonical URL is only
+    downloaded and parsed once per pipeline run.
+    """
+    canonical = {url: _canonical_url(url) for url in urls}
+    to_fetch = sorted({c for c in canonical.values() if c not in _LINK_CACHE})
+    if to_fetch:
+        _LINK_CACHE.update(asyncio.run(_fetch_all_links(to_fetch)))
+    return {url: _LINK_CACHE.get(canon, "") for url, canon in canonical.items()}
+
+
 def _fetch_link_content(url: str) -> str:
-    """Fetch and extract article text from a URL."""
+    """Sync convenience wrapper for fetching a single URL."""
+    return _fetch_links([url]).get(url, "")
+
+
+def _make_http_client() -> httpx.AsyncClient:
+    """Connection-pooled client used for all article fetches in a run."""
+    return httpx.AsyncClient(
+        timeout=15.0,
+        follow_redirects=True,
+        headers={"User-Agent": "NewsletterParser/1.0"},
+        http2=True,
+        limits=httpx.Limits(max_connections=32),
+    )
+
+
+async def _fetch_all_links(urls: list[str]) -> dict[str, str]:
+    """Dispatch all URL fetches concurrently over one connection-pooled client."""
+    async with _make_http_client() as http:
+        texts = await asyncio.gather(*(_fetch_one_safe(http, url) for url in urls))
+    return dict(zip(urls, texts))
+
+
+async def _fetch_one_safe(http: httpx.AsyncClient, url: str) -> str:
+    """Blanket guard around :func:`_fetch_one`, mirroring `_prepare_safe` —
+    a failed article download degrades to empty text instead of sinking the
+    gather (and with it the whole run)."""
     try:
-        with httpx.Client(
-            timeout=15.0,
-            follow_redirects=True,
-            headers={"User-Agent": "NewsletterParser/1.0"},
-        ) as http:
-            resp = http.get(url)
-            resp.raise_for_status()
+        return await _fetch_one(http, url)
     except Exception:
-        logger.warning("Failed to fetch link: %s", url)
+        logger.exception("Link fetch failed for %s; dropping its content", url)
         return ""
 
-    content_type = resp.headers.get("content-type", "")
-    if "html" not in content_type:
+
+async def _fetch_one(http: httpx.AsyncClient, url: str) -> str:
+    """Fetch and extract article text from a URL; empty string on failure."""
+    try:
+        async with http.stream("GET", url) as resp:
+            resp.raise_for_status()
+
+            content_type = resp.headers.get("content-type", "")
+            if "html" not in content_type:
+                return ""
+
+            # Skip pages that are clearly not articles (SPA bundles, media)
+            length = resp.headers.get("content-length")
+            if length and int(length) > _MAX_PAGE_BYTES:
+                logger.debug("Skipping overlarge page (%s bytes): %s", length, url)
+                return ""
+
+            # Only the article text survives an 8k-char truncation anyway, so
+            # stop downloading once we have the first 64KB
+            buf = bytearray()
+            async for chunk in resp.aiter_bytes():
+                buf += chunk
+                if len(buf) >= _MAX_DOWNLOAD_BYTES:
+                    break
+            # Servers declare charsets Python doesn't know (utf8mb4) or that
+            # name bytes-to-bytes codecs (base64, rot13 — these pass a
+            # codecs.lookup probe but are not text encodings); in either
+            # case errors="replace" can't help, so decode as utf-8 rather
+            # than lose the page
+            encoding = resp.charset_encoding or "utf-8"
+            try:
+                html = buf.decode(encoding, errors="replace")
+            except LookupError:
+                html = buf.decode("utf-8", errors="replace")
+    except Exception:
+        logger.warning("Failed to fetch link: %s", url)
         return ""
 
-    soup = BeautifulSoup(resp.text, "lxml")
+    tree = HTMLParser(html)
 
     # Remove non-content elements
-    for tag in soup(["script", "style", "nav", "footer", "header", "aside", "iframe"]):
-        tag.decompose()
+    tree.strip_tags(["script", "style", "nav", "footer", "header", "aside", "iframe"])
 
     # Try to find the main article content
-    article = soup.find("article") or soup.find("main") or soup.find("body")
+    article = tree.css_first("article") or tree.css_first("main") or tree.body
     if article is None:
         return ""
 
-    text = article.get_text(separator="\n", strip=True)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = article.text(separator="\n", strip=True)
+    text = _EXCESS_NEWLINES.sub("\n\n", text)
 
     # Cap at ~8k chars to avoid huge payloads
     text = _strip_invisible_unicode(text[:8000])
@@ -278,39 +480,155 @@ def _fetch_link_content(url: str) -> str:
 # ── Chunked Summarization ───────────────────────────────────────────────────
 
 
-def _chunked_summarize(
-    text: str,
-    client: anthropic.Anthropic,
-    enc: tiktoken.Encoding,
-    settings: Settings,
-) -> str:
-    """Split text into chunks and summarize each with Haiku, then concatenate."""
-    tokens = enc.encode(text)
-    chunk_size = settings.token_budget
-    # Use 25% overlap for sliding window
-    stride = int(chunk_size * 0.75)
-
-    summaries: list[str] = []
-    pos = 0
-
-    while pos < len(tokens):
-        chunk_tokens = tokens[pos : pos + chunk_size]
-        chunk_text = enc.decode(chunk_tokens)
+def _summarize_all(chunk_lists: list[list[str]], settings: Settings) -> list[str]:
+    """Summarize every chunk of every email; returns one joined summary per
+    email, in input order.
 
+    Large workloads go through the Message Batches API (50% cheaper, built
+    for throughput — this pipeline is not latency-sensitive); small ones and
+    batch-API failures use direct concurrent calls.
+    """
+    flat = [
+        (owner, chunk)
+        for owner, chunks in enumerate(chunk_lists)
+        for chunk in chunks
+    ]
+
+    texts: list[str] | None = None
+    if len(flat) >= _BATCH_API_MIN_REQUESTS:
         try:
-            response = client.messages.create(
-                model=settings.triage_model,  # Use cheap model for chunk summarization
-                max_tokens=512,
-                system=CHUNK_SUMMARY_SYSTEM,
-                messages=[
-                    {"role": "user", "content": CHUNK_SUMMARY_USER.format(chunk=chunk_text)}
-                ],
-            )
-            summaries.append(response.content[0].text)
+            texts = _summarize_via_batch_api([chunk for _, chunk in flat], settings)
         except Exception:
-            logger.warning("Chunk summarization failed; using raw truncation")
-            summaries.append(chunk_text[:500] + "...")
+            logger.exception(
+                "Batch API summarization failed; falling back to direct calls"
+            )
+    if texts is None:
+        texts = asyncio.run(
+            _summarize_chunks([chunk for _, chunk in flat], settings)
+        )
+
+    grouped: list[list[str]] = [[] for _ in chunk_lists]
+    for (owner, _), summary in zip(flat, texts):
+        grouped[owner].append(summary)
+    return ["\n\n".join(summaries) for summaries in grouped]
+
+
+def _summarize_via_batch_api(chunks: list[str], settings: Settings) -> list[str]:
+    """Submit all chunk prompts as one Message Batches job and poll until done."""
+    client = llm.get_client(settings.anthropic_api_key)
+
+    batch = client.messages.batches.create(
+        requests=[
+            {
+                "custom_id": f"chunk-{idx}",
+                "params": {
+                    "model": settings.triage_model,
+                    "max_tokens": 512,
+                    "system": [
+                        {
+                            "type": "text",
+                            "text": CHUNK_SUMMARY_SYSTEM,
+                            "cache_control": {"type": "ephemeral"},
+                        }
+                    ],
+                    "messages": [
+                        {
+                            "role": "user",
+                            "content": CHUNK_SUMMARY_USER.format(chunk=chunk),
+                        }
+                    ],
+                },
+            }
+            for idx, chunk in enumerate(chunks)
+        ]
+    )
+    logger.info(
+        "Submitted %d chunk summaries as message batch %s", len(chunks), batch.id
+    )
+
+    while batch.processing_status != "ended":
+        time.sleep(_BATCH_POLL_SECONDS)
+        batch = client.messages.batches.retrieve(batch.id)
+
+    texts = [""] * len(chunks)
+    for result in client.messages.batches.results(batch.id):
+        idx = int(result.custom_id.removeprefix("chunk-"))
+        if result.result.type == "succeeded":
+            texts[idx] = result.result.message.content[0].text
+        else:
+            logger.warning(
+                "Chunk summarization failed (%s); using raw truncation",
+                result.result.type,
+            )
+            texts[idx] = chunks[idx][:500] + "..."
+    return texts
+
+
+def _split_chunks(text: str, token_count: int, token_budget: int) -> list[str]:
+    """Slice text into overlapping chunks of roughly *token_budget* tokens.
+
+    Chunks on character offsets derived from the measured tokens-per-char
+    ratio — the text was already tokenized once to measure it, so there is
+    no need for encode/decode round-trips per chunk.
+    """
+    chars_per_token = len(text) / max(token_count, 1)
+    chunk_chars = int(token_budget * chars_per_token)
+    # Use 25% overlap for sliding window
+    stride = int(chunk_chars * 0.75)
+
+    # Allow snapping back up to 10% of a chunk to land on a paragraph break
+    tolerance = chunk_chars // 10
 
+    chunks: list[str] = []
+    pos = 0
+    while pos < len(text):
+        end = pos + chunk_chars
+        if end < len(text):
+            # Prefer a paragraph break near the cut, else a word boundary.
+            # Both searches are bounded to the tolerance window: pos still
+            # advances by the fixed stride, so snapping back further than
+            # the 25% overlap would leave a gap no chunk covers.
+            boundary = text.rfind("\n\n", end - tolerance, end)
+            if boundary <= pos:
+                boundary = text.rfind(" ", end - tolerance, end)
+            if boundary > pos:
+                end = boundary
+        chunks.append(text[pos:end])
         pos += stride
+    return chunks
+
+
+async def _summarize_chunks(chunks: list[str], settings: Settings) -> list[str]:
+    """Summarize all chunks concurrently; each call blocks 1-3s on the API,
+    so gathering collapses wall time to roughly one call's latency."""
+    client = llm.make_async_client(settings.anthropic_api_key)
+    sem = asyncio.Semaphore(_CHUNK_CONCURRENCY)
+
+    async def _one(chunk_text: str) -> str:
+        async with sem:
+            try:
+                response = await client.messages.create(
+                    model=settings.triage_model,  # Use cheap model for chunk summarization
+                    max_tokens=512,
+                    # The system prompt is identical for every chunk; mark it
+                    # cacheable so the server reuses the prefix across calls
+                    system=[
+                        {
+                            "type": "text",
+                            "text": CHUNK_SUMMARY_SYSTEM,
+                            "cache_control": {"type": "ephemeral"},
+                        }
+                    ],
+                    messages=[
+                        {"role": "user", "content": CHUNK_SUMMARY_USER.format(chunk=chunk_text)}
+                    ],
+                )
+                return response.content[0].text
+            except Exception:
+                logger.warning("Chunk summarization failed; using raw truncation")
+                return chunk_text[:500] + "..."
 
-    return "\n\n".join(summaries)
+    try:
+        return list(await asyncio.gather(*(_one(c) for c in chunks)))
+    finally:
+        await client.close()
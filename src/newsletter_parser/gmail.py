@@ -4,11 +4,15 @@ from __future__ import annotations
 
 import base64
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
+import google_auth_httplib2
+import httplib2
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -25,6 +29,14 @@ SCOPES = [
     "https://www.googleapis.com/auth/gmail.modify",
 ]
 
+# MIME subtrees that can never contain extractable text (inline images,
+# attachments, media) — skipped without recursing
+_NON_TEXT_MIME_PREFIXES = ("image/", "application/", "audio/", "video/")
+
+# Concurrent batch HTTP requests during message fetches; bounded well below
+# Gmail's per-user quota (250 units/sec)
+_FETCH_WORKERS = 6
+
 
 @dataclass
 class RawEmail:
@@ -45,6 +57,8 @@ class GmailClient:
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
         self._service: Resource | None = None
+        self._creds: Credentials | None = None
+        self._http_local = threading.local()
 
     # ── Authentication ───────────────────────────────────────────────────
 
@@ -81,9 +95,23 @@ class GmailClient:
             self._settings.token_path.write_text(creds.to_json())
             logger.info("Token saved to %s", self._settings.token_path)
 
+        self._creds = creds
         self._service = build("gmail", "v1", credentials=creds)
         logger.info("Gmail service ready")
 
+    def _authorized_http(self) -> google_auth_httplib2.AuthorizedHttp:
+        """Per-thread authorized transport — httplib2.Http is not thread-safe,
+        so each worker gets its own, but it is cached on the thread so
+        successive batch waves reuse the same TCP/TLS connection instead of
+        paying a fresh handshake per batch."""
+        http = getattr(self._http_local, "http", None)
+        if http is None:
+            http = google_auth_httplib2.AuthorizedHttp(
+                self._creds, http=httplib2.Http()
+            )
+            self._http_local.http = http
+        return http
+
     # ── Fetch ────────────────────────────────────────────────────────────
 
     @property
@@ -92,13 +120,13 @@ class GmailClient:
             raise RuntimeError("Call authenticate() first")
         return self._service
 
-    def fetch_updates(
+    def list_message_ids(
         self, since: datetime | None = None, base_query: str | None = None
-    ) -> list[RawEmail]:
-        """Fetch emails matching *base_query* (default from settings).
+    ) -> list[str]:
+        """List message IDs matching *base_query* (default from settings).
 
         Args:
-            since: If provided, only fetch emails after this timestamp.
+            since: If provided, only list emails after this timestamp.
                    On first run this is typically 7 days ago.
             base_query: Gmail search query override. Defaults to
                         ``settings.gmail_query``.
@@ -110,7 +138,6 @@ class GmailClient:
 
         logger.info("Gmail query: %s", query)
 
-        # Collect all message IDs first (lightweight list calls)
         msg_ids: list[str] = []
         page_token: str | None = None
 
@@ -127,18 +154,36 @@ class GmailClient:
             if not page_token:
                 break
 
-        logger.info("Found %d message IDs, fetching bodies via batch API…", len(msg_ids))
+        logger.info("Found %d message IDs", len(msg_ids))
+        return msg_ids
 
-        # Fetch full messages using Gmail batch API (up to 50 per HTTP call)
-        import time
+    def fetch_metadata(self, msg_ids: list[str]) -> list[RawEmail]:
+        """Fetch headers + snippet only — roughly 10× smaller payloads than
+        ``format="full"``, enough for triage to classify on.
+        """
+        return self._batch_fetch(msg_ids, fmt="metadata")
+
+    def fetch_full(self, msg_ids: list[str]) -> list[RawEmail]:
+        """Fetch full MIME bodies for the given message IDs."""
+        return self._batch_fetch(msg_ids, fmt="full")
 
+    def _batch_fetch(self, msg_ids: list[str], fmt: str) -> list[RawEmail]:
+        """Fetch messages using the Gmail batch API (up to 100 ops per HTTP call).
+
+        Metadata fetches use the full 100-op limit; full-body fetches stay at
+        50 since their larger per-message quota cost trips rate limits sooner.
+        """
         messages: list[RawEmail] = []
-        failed_ids: list[str] = []
-        BATCH_SIZE = 50
+        BATCH_SIZE = 100 if fmt == "metadata" else 50
 
-        def _run_batch(ids: list[str]) -> list[str]:
-            """Execute a batch fetch, return IDs that failed with 429."""
+        get_kwargs: dict = {"format": fmt}
+        if fmt == "metadata":
+            get_kwargs["metadataHeaders"] = ["Subject", "From", "Date"]
+
+        def _run_batch(ids: list[str]) -> tuple[list[RawEmail], list[str]]:
+            """Execute a batch fetch; returns (fetched, IDs that failed with 429)."""
             batch = self.service.new_batch_http_request()
+            fetched: list[RawEmail] = []
             retry_ids: list[str] = []
 
             def _make_callback(mid: str):
@@ -151,31 +196,47 @@ class GmailClient:
                         return
                     raw = self._parse_message(mid, response)
                     if raw is not None:
-                        messages.append(raw)
+                        fetched.append(raw)
                 return _cb
 
             for mid in ids:
                 batch.add(
-                    self.service.users().messages().get(userId="me", id=mid, format="full"),
+                    self.service.users().messages().get(userId="me", id=mid, **get_kwargs),
                     callback=_make_callback(mid),
                 )
-            batch.execute()
-            return retry_ids
-
-        # First pass: fetch all in batches of BATCH_SIZE
+            batch.execute(http=self._authorized_http())
+            return fetched, retry_ids
+
+        # First pass: dispatch batches of BATCH_SIZE in concurrent waves of
+        # _FETCH_WORKERS; each worker returns its own result list so nothing
+        # shared is mutated. Pacing between waves is adaptive: no sleep while
+        # Gmail accepts full waves, exponential backoff (capped at 8s) once
+        # batches start getting rate-limited.
+        chunks = [
+            msg_ids[i : i + BATCH_SIZE] for i in range(0, len(msg_ids), BATCH_SIZE)
+        ]
         all_retry_ids: list[str] = []
-        for batch_start in range(0, len(msg_ids), BATCH_SIZE):
-            batch_ids = msg_ids[batch_start : batch_start + BATCH_SIZE]
-            retries = _run_batch(batch_ids)
-            all_retry_ids.extend(retries)
-            logger.debug(
-                "Batch fetched %d/%d (%d rate-limited)",
-                min(batch_start + BATCH_SIZE, len(msg_ids)),
-                len(msg_ids),
-                len(retries),
-            )
-            if batch_start + BATCH_SIZE < len(msg_ids):
-                time.sleep(1)
+        limited_waves = 0
+        with ThreadPoolExecutor(max_workers=_FETCH_WORKERS) as executor:
+            for wave_start in range(0, len(chunks), _FETCH_WORKERS):
+                wave = chunks[wave_start : wave_start + _FETCH_WORKERS]
+                wave_retries = 0
+                for fetched, retries in executor.map(_run_batch, wave):
+                    messages.extend(fetched)
+                    all_retry_ids.extend(retries)
+                    wave_retries += len(retries)
+                logger.debug(
+                    "Fetched %d/%d messages (%d rate-limited)",
+                    len(messages),
+                    len(msg_ids),
+                    wave_retries,
+                )
+                if wave_retries:
+                    limited_waves += 1
+                else:
+                    limited_waves = 0
+                if limited_waves and wave_start + _FETCH_WORKERS < len(chunks):
+                    time.sleep(min(2 ** limited_waves, 8))
 
         # Retry pass: re-fetch any 429'd messages with smaller batches and longer delays
         if all_retry_ids:
@@ -184,7 +245,8 @@ class GmailClient:
             RETRY_BATCH = 25
             for batch_start in range(0, len(all_retry_ids), RETRY_BATCH):
                 batch_ids = all_retry_ids[batch_start : batch_start + RETRY_BATCH]
-                still_failed = _run_batch(batch_ids)
+                fetched, still_failed = _run_batch(batch_ids)
+                messages.extend(fetched)
                 if still_failed:
                     logger.warning(
                         "%d messages still failed after retry", len(still_failed)
@@ -192,19 +254,28 @@ class GmailClient:
                 if batch_start + RETRY_BATCH < len(all_retry_ids):
                     time.sleep(2)
 
-        logger.info("Fetched %d messages", len(messages))
+        logger.info("Fetched %d messages (%s)", len(messages), fmt)
         return messages
 
+    @staticmethod
+    def _header(headers: list[dict], name: str, default: str) -> str:
+        """Linear scan with early exit for one header — cheaper than building
+        a lowercased dict of all 30+ MIME headers to read three."""
+        for h in headers:
+            if h["name"].lower() == name:
+                return h["value"]
+        return default
+
     def _parse_message(self, msg_id: str, msg: dict) -> RawEmail | None:
         """Parse a full message response into a RawEmail."""
         try:
-            headers = {h["name"].lower(): h["value"] for h in msg["payload"]["headers"]}
+            headers = msg["payload"]["headers"]
+            subject = self._header(headers, "subject", "(no subject)")
+            sender = self._header(headers, "from", "unknown")
+            date = self._header(headers, "date", "")
         except (KeyError, TypeError):
             logger.warning("Malformed message %s, skipping", msg_id)
             return None
-        subject = headers.get("subject", "(no subject)")
-        sender = headers.get("from", "unknown")
-        date = headers.get("date", "")
         snippet = msg.get("snippet", "")
 
         body_html, body_text = self._extract_body(msg["payload"])
@@ -221,12 +292,20 @@ class GmailClient:
 
     @staticmethod
     def _extract_body(payload: dict) -> tuple[str, str]:
-        """Recursively extract HTML and plain-text bodies from a message payload."""
+        """Recursively extract HTML and plain-text bodies from a message payload.
+
+        Skips non-text subtrees (images, attachments) entirely, and stops
+        walking a ``multipart/alternative`` container once both an HTML and a
+        plain-text variant have been decoded — the remaining alternatives are
+        renderings of the same content.
+        """
         html_parts: list[str] = []
         text_parts: list[str] = []
 
         def _walk(part: dict) -> None:
             mime = part.get("mimeType", "")
+            if mime.startswith(_NON_TEXT_MIME_PREFIXES):
+                return
             if mime == "text/html":
                 data = part.get("body", {}).get("data", "")
                 if data:
@@ -239,7 +318,10 @@ class GmailClient:
                     text_parts.append(
                         base64.urlsafe_b64decode(data).decode("utf-8", errors="replace")
                     )
+            is_alternative = mime == "multipart/alternative"
             for sub in part.get("parts", []):
+                if is_alternative and html_parts and text_parts:
+                    break
                 _walk(sub)
 
         _walk(payload)
@@ -254,12 +336,13 @@ class GmailClient:
             profile = self.service.users().getProfile(userId="me").execute()
             recipient = profile["emailAddress"]
 
-        msg = MIMEMultipart("alternative")
+        # Single-part HTML message — no multipart/alternative wrapper needed
+        # when there is only one body variant
+        msg = MIMEText(html_body, "html", _charset="utf-8")
         msg["To"] = recipient
         msg["Subject"] = subject
-        msg.attach(MIMEText(html_body, "html"))
 
-        raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
+        raw = base64.urlsafe_b64encode(msg.as_bytes()).rstrip(b"=").decode()
         self.service.users().messages().send(
             userId="me", body={"raw": raw}
         ).execute()
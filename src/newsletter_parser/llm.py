@@ -0,0 +1,91 @@
+"""Shared Anthropic client construction and rate limiting for all pipeline stages."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+
+import anthropic
+import httpx
+
+
+# The SDK default of 2 retries gives up too quickly under sustained 429/529
+# pressure; 5 attempts with the SDK's own exponential backoff + jitter rides
+# out provider hiccups instead of demoting whole batches to fallbacks.
+_MAX_RETRIES = 5
+
+
+@functools.lru_cache(maxsize=2)
+def get_client(api_key: str) -> anthropic.Anthropic:
+    """Cached synchronous client — reuses one HTTP connection pool across
+    stages instead of rebuilding TLS state per call site."""
+    return anthropic.Anthropic(api_key=api_key, max_retries=_MAX_RETRIES)
+
+
+def make_async_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Fresh async client for the calling event loop, with one HTTP/2 pool.
+
+    Async clients are bound to the loop that first uses them, and each stage
+    runs its own short-lived loop via ``asyncio.run``, so these cannot be
+    cached across stages the way the sync client is. Within a stage, though,
+    all concurrent batch calls share this client's pool — HTTP/2 multiplexes
+    them over a single TLS connection instead of one handshake per in-flight
+    request.
+    """
+    return anthropic.AsyncAnthropic(
+        api_key=api_key,
+        max_retries=_MAX_RETRIES,
+        http_client=anthropic.DefaultAsyncHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+        ),
+    )
+
+
+class AsyncRateLimiter:
+    """Token bucket over requests/minute and estimated input tokens/minute.
+
+    Refills lazily from elapsed time on each acquire rather than via a
+    background task — there is nothing to refill while nobody is waiting.
+    Waiters queue on one lock, so admission is first-come-first-served.
+    """
+
+    def __init__(self, rpm: int, tpm: int) -> None:
+        self._rpm = rpm
+        self._tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int, requests: int = 1) -> None:
+        """Block until the bucket has room for one call of *tokens* tokens."""
+        # A single oversized request must not deadlock: let it drain the
+        # full bucket instead
+        tokens = min(tokens, self._tpm)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                elapsed = now - self._last
+                self._last = now
+                self._requests = min(
+                    float(self._rpm), self._requests + elapsed * self._rpm / 60.0
+                )
+                self._tokens = min(
+                    float(self._tpm), self._tokens + elapsed * self._tpm / 60.0
+                )
+                if self._requests >= requests and self._tokens >= tokens:
+                    self._requests -= requests
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (requests - self._requests) * 60.0 / self._rpm,
+                    (tokens - self._tokens) * 60.0 / self._tpm,
+                )
+                await asyncio.sleep(wait)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Cheap ~4-chars-per-token estimate for rate-limit accounting."""
+    return sum(len(t) for t in texts) // 4
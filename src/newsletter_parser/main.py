@@ -5,14 +5,12 @@ from __future__ import annotations
 import argparse
 import logging
 import sys
+from dataclasses import replace
 from datetime import datetime, timedelta, timezone
 
 from newsletter_parser.config import get_settings, Settings
-from newsletter_parser.extractor import extract_items
 from newsletter_parser.gmail import GmailClient
 from newsletter_parser.state import StateStore
-from newsletter_parser.synthesizer import build_subject, synthesize_briefing
-from newsletter_parser.triage import triage_emails
 
 logger = logging.getLogger("newsletter_parser")
 
@@ -117,15 +115,26 @@ def _cmd_run(
     lookback_days_override: int | None = None,
 ) -> None:
     """Execute the full newsletter processing pipeline."""
+    # Stage modules pull in anthropic, tiktoken, mistune, lxml, and httpx —
+    # a few hundred ms of cold start that `setup` never needs, so they are
+    # imported here rather than at module load
+    from newsletter_parser.extractor import extract_items
+    from newsletter_parser.synthesizer import build_subject, synthesize_briefing
+    from newsletter_parser.triage import triage_emails
+
     # 1. Initialize
     gmail = GmailClient(settings)
     gmail.authenticate()
     state = StateStore(settings.db_path)
 
+    # One timestamp for the whole run — state records and the briefing's
+    # date line all agree, and batched inserts don't each hit the clock
+    run_now = datetime.now(timezone.utc)
+
     try:
         # 2. Determine time window
         if lookback_days_override is not None:
-            since = datetime.now(timezone.utc) - timedelta(
+            since = run_now - timedelta(
                 days=lookback_days_override
             )
             logger.info(
@@ -134,7 +143,7 @@ def _cmd_run(
                 since.isoformat(),
             )
         elif (last_run := state.last_run_time()) is None:
-            since = datetime.now(timezone.utc) - timedelta(
+            since = run_now - timedelta(
                 days=settings.initial_lookback_days
             )
             logger.info(
@@ -146,43 +155,50 @@ def _cmd_run(
             since = last_run
             logger.info("Fetching emails since last run: %s", since.isoformat())
 
-        # 3. Fetch
-        emails = gmail.fetch_updates(since=since)
-
-        # Dump fetched emails to file if requested
-        if dump_emails_path and emails:
-            from pathlib import Path
-
-            lines = [f"Fetched {len(emails)} emails (query: {settings.gmail_query})\n"]
-            for i, e in enumerate(emails, 1):
-                lines.append(f"{i}. {e.subject}")
-                lines.append(f"   From: {e.sender}")
-                lines.append(f"   Date: {e.date}")
-                lines.append(f"   Snippet: {e.snippet[:120]}")
-                lines.append("")
-            Path(dump_emails_path).write_text("\n".join(lines), encoding="utf-8")
-            logger.info("Email list written to %s", dump_emails_path)
+        # 3. List candidate message IDs (lightweight)
+        msg_ids = gmail.list_message_ids(since=since)
 
-        if not emails:
+        if not msg_ids:
             logger.info("No new emails found. Nothing to do.")
             state.record_run(0)
             return
 
-        # 4. Deduplicate against already-processed messages
-        unprocessed = [e for e in emails if not state.is_processed(e.id)]
-        if not unprocessed:
+        # 4. Deduplicate against already-processed messages before fetching
+        unprocessed_ids = state.filter_unprocessed(msg_ids)
+        if not unprocessed_ids:
             logger.info("All fetched emails already processed. Nothing to do.")
             state.record_run(0)
             return
 
         logger.info(
             "%d new emails to process (%d already processed)",
-            len(unprocessed),
-            len(emails) - len(unprocessed),
+            len(unprocessed_ids),
+            len(msg_ids) - len(unprocessed_ids),
         )
 
+        # Fetch lightweight metadata (headers + snippet) — full bodies are
+        # only downloaded later for emails that survive triage
+        emails = gmail.fetch_metadata(unprocessed_ids)
+
+        # Dump fetched emails to file if requested
+        if dump_emails_path and emails:
+            # Stream straight to the file instead of accumulating the whole
+            # dump (one short string per line) in memory first
+            with open(dump_emails_path, "w", encoding="utf-8") as fh:
+                fh.write(
+                    f"Fetched {len(emails)} emails (query: {settings.gmail_query})\n\n"
+                )
+                for i, e in enumerate(emails, 1):
+                    fh.write(
+                        f"{i}. {e.subject}\n"
+                        f"   From: {e.sender}\n"
+                        f"   Date: {e.date}\n"
+                        f"   Snippet: {e.snippet[:120]}\n\n"
+                    )
+            logger.info("Email list written to %s", dump_emails_path)
+
         # 5. Stage 1: Triage (always get all results for inbox management)
-        all_triage = triage_emails(unprocessed, settings, return_all=True)
+        all_triage = triage_emails(emails, settings, return_all=True)
         triaged = [
             r for r in all_triage
             if r.category != "discard"
@@ -192,52 +208,62 @@ def _cmd_run(
         discarded_ids = [r.email.id for r in all_triage if r.email.id not in kept_ids]
 
         if dump_triage_path:
-            from pathlib import Path
-
-            lines = [f"Triage results: {len(triaged)} kept / {len(all_triage)} total\n"]
-            lines.append("=" * 60)
-            lines.append("KEPT")
-            lines.append("=" * 60)
-            for r in sorted(all_triage, key=lambda r: r.relevance_score, reverse=True):
-                if r.email.id in kept_ids:
-                    lines.append(
-                        f"  [{r.category}] score={r.relevance_score:.2f}  {r.email.subject}"
+            divider = "=" * 60
+            # One sort, then one partitioning pass — each membership test
+            # against kept_ids happens exactly once per result
+            ranked = sorted(
+                all_triage, key=lambda r: r.relevance_score, reverse=True
+            )
+            kept_ranked: list = []
+            discarded_ranked: list = []
+            for r in ranked:
+                (kept_ranked if r.email.id in kept_ids else discarded_ranked).append(r)
+            with open(dump_triage_path, "w", encoding="utf-8") as fh:
+                fh.write(
+                    f"Triage results: {len(triaged)} kept / {len(all_triage)} total\n\n"
+                )
+                fh.write(f"{divider}\nKEPT\n{divider}\n")
+                for r in kept_ranked:
+                    fh.write(
+                        f"  [{r.category}] score={r.relevance_score:.2f}  {r.email.subject}\n"
+                        f"    From: {r.email.sender}\n"
+                        f"    Topics: {', '.join(r.topics) or '(none)'}\n"
+                        f"    Reason: {r.reason}\n\n"
                     )
-                    lines.append(f"    From: {r.email.sender}")
-                    lines.append(f"    Topics: {', '.join(r.topics) or '(none)'}")
-                    lines.append(f"    Reason: {r.reason}")
-                    lines.append("")
-            lines.append("=" * 60)
-            lines.append("DISCARDED")
-            lines.append("=" * 60)
-            for r in sorted(all_triage, key=lambda r: r.relevance_score, reverse=True):
-                if r.email.id not in kept_ids:
-                    lines.append(
-                        f"  [{r.category}] score={r.relevance_score:.2f}  {r.email.subject}"
+                fh.write(f"{divider}\nDISCARDED\n{divider}\n")
+                for r in discarded_ranked:
+                    fh.write(
+                        f"  [{r.category}] score={r.relevance_score:.2f}  {r.email.subject}\n"
+                        f"    From: {r.email.sender}\n"
+                        f"    Reason: {r.reason}\n\n"
                     )
-                    lines.append(f"    From: {r.email.sender}")
-                    lines.append(f"    Reason: {r.reason}")
-                    lines.append("")
-            Path(dump_triage_path).write_text("\n".join(lines), encoding="utf-8")
             logger.info("Triage results written to %s", dump_triage_path)
 
         if not triaged:
             logger.info("All emails were discarded by triage. No briefing needed.")
             if not dry_run:
                 gmail.mark_as_read(discarded_ids)
-                for e in unprocessed:
-                    state.mark_processed(e.id)
-            state.record_run(len(unprocessed))
+                state.mark_all_processed(unprocessed_ids, ts=run_now)
+            state.record_run(len(unprocessed_ids), ts=run_now)
             return
 
-        # 6. Stage 2: Extract
+        # 6. Stage 2: Fetch full bodies for triage survivors, then extract
+        full_by_id = {
+            e.id: e for e in gmail.fetch_full([r.email.id for r in triaged])
+        }
+        triaged = [
+            replace(r, email=full_by_id[r.email.id])
+            if r.email.id in full_by_id
+            else r
+            for r in triaged
+        ]
         extracted = extract_items(triaged, settings)
 
         # 7. Stage 3: Synthesize
-        md_text, html_text = synthesize_briefing(extracted, settings)
+        md_text, html_text = synthesize_briefing(extracted, settings, now=run_now)
 
         # 8. Deliver
-        subject = build_subject()
+        subject = build_subject(now=run_now)
 
         if dry_run:
             if output_path:
@@ -267,9 +293,8 @@ def _cmd_run(
             gmail.move_to_label(list(kept_ids), label_id)
 
             # 10. Update state
-            for e in unprocessed:
-                state.mark_processed(e.id)
-            state.record_run(len(unprocessed))
+            state.mark_all_processed(unprocessed_ids, ts=run_now)
+            state.record_run(len(unprocessed_ids), ts=run_now)
 
             logger.info("Pipeline complete. Briefing sent.")
 
@@ -7,6 +7,8 @@ import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,12 +18,33 @@ class StateStore:
     def __init__(self, db_path: Path) -> None:
         self._db_path = db_path
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(self._db_path))
+        # check_same_thread=False: stage workers may touch state from pool
+        # threads; access is serialized at the call sites
+        self._conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
         self._init_schema()
+        # Mirror of processed_messages, seeded once; membership checks after
+        # construction are O(1) hash lookups instead of SQL round trips.
+        # ~80 bytes per ID, so even years of history stay small.
+        self._processed: set[str] = {
+            row[0]
+            for row in self._conn.execute("SELECT message_id FROM processed_messages")
+        }
 
     # ── Schema ───────────────────────────────────────────────────────────
 
     def _init_schema(self) -> None:
+        # WAL with NORMAL sync: commits no longer fsync the main DB file on
+        # every transaction, which matters for our append-heavy writes. The
+        # remaining pragmas keep sorts/temp tables in memory and give the
+        # page cache ~8MB.
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-8000;
+            """
+        )
         with self._conn:
             self._conn.executescript(
                 """
@@ -41,23 +64,41 @@ class StateStore:
 
     def is_processed(self, message_id: str) -> bool:
         """Check if a message has already been processed."""
-        row = self._conn.execute(
-            "SELECT 1 FROM processed_messages WHERE message_id = ?", (message_id,)
-        ).fetchone()
-        return row is not None
+        return message_id in self._processed
 
-    def mark_processed(self, message_id: str) -> None:
+    def mark_processed(self, message_id: str, ts: datetime | None = None) -> None:
         """Record a message as processed."""
-        now = datetime.now(timezone.utc).isoformat()
+        now = (ts or datetime.now(timezone.utc)).isoformat()
         with self._conn:
             self._conn.execute(
                 "INSERT OR IGNORE INTO processed_messages (message_id, processed_at) VALUES (?, ?)",
                 (message_id, now),
             )
+        self._processed.add(message_id)
+
+    def mark_all_processed(
+        self, message_ids: list[str], ts: datetime | None = None
+    ) -> None:
+        """Record many messages as processed in one transaction.
+
+        A single commit (one fsync) instead of one per message.
+        """
+        now = (ts or datetime.now(timezone.utc)).isoformat()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO processed_messages (message_id, processed_at) VALUES (?, ?)",
+                [(mid, now) for mid in message_ids],
+            )
+        self._processed.update(message_ids)
+
+    def processed_ids(self, message_ids: list[str]) -> set[str]:
+        """Return the subset of *message_ids* that have already been processed."""
+        return self._processed.intersection(message_ids)
 
     def filter_unprocessed(self, message_ids: list[str]) -> list[str]:
         """Return only IDs that have not been processed yet."""
-        return [mid for mid in message_ids if not self.is_processed(mid)]
+        seen = self.processed_ids(message_ids)
+        return [mid for mid in message_ids if mid not in seen]
 
     # ── Run history ──────────────────────────────────────────────────────
 
@@ -70,9 +111,11 @@ class StateStore:
             return None
         return datetime.fromisoformat(row[0])
 
-    def record_run(self, messages_processed: int) -> None:
+    def record_run(
+        self, messages_processed: int, ts: datetime | None = None
+    ) -> None:
         """Record a successful pipeline run."""
-        now = datetime.now(timezone.utc).isoformat()
+        now = (ts or datetime.now(timezone.utc)).isoformat()
         with self._conn:
             self._conn.execute(
                 "INSERT INTO runs (ran_at, messages_processed) VALUES (?, ?)",
@@ -84,3 +127,69 @@ class StateStore:
 
     def close(self) -> None:
         self._conn.close()
+
+
+class TriageCache:
+    """Persistent cache of triage classifications, keyed by content hash.
+
+    The triage stage computes the key (sender/subject/preview plus model and
+    topic config, so config changes invalidate naturally); this class only
+    stores and retrieves the classification fields. Repeated deliveries of
+    the same newsletter issue across syncs then skip their LLM call.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            """
+        )
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS triage_cache (
+                    key      TEXT PRIMARY KEY,
+                    category TEXT NOT NULL,
+                    score    REAL NOT NULL,
+                    topics   TEXT NOT NULL,
+                    reason   TEXT NOT NULL,
+                    cached_at TEXT NOT NULL
+                )
+                """
+            )
+
+    def get(self, key: str) -> tuple[str, float, list[str], str] | None:
+        """Return (category, score, topics, reason) for *key*, or None on miss."""
+        row = self._conn.execute(
+            "SELECT category, score, topics, reason FROM triage_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], orjson.loads(row[2]), row[3]
+
+    def put_many(
+        self,
+        entries: list[tuple[str, str, float, list[str], str]],
+        ts: datetime | None = None,
+    ) -> None:
+        """Store (key, category, score, topics, reason) tuples in one transaction."""
+        if not entries:
+            return
+        now = (ts or datetime.now(timezone.utc)).isoformat()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO triage_cache "
+                "(key, category, score, topics, reason, cached_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (key, category, score, orjson.dumps(topics).decode(), reason, now)
+                    for key, category, score, topics, reason in entries
+                ],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
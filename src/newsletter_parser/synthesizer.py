@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 import logging
+import re
 from datetime import datetime, timezone
 
-import anthropic
-import markdown
+import jinja2
+import lxml.html
+import mistune
+import xxhash
 
+from newsletter_parser import llm
 from newsletter_parser.config import Settings
 from newsletter_parser.extractor import ExtractedItem
 from newsletter_parser.prompts import (
@@ -18,24 +22,145 @@ from newsletter_parser.prompts import (
 
 logger = logging.getLogger(__name__)
 
+_FONT = "-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Helvetica,Arial,sans-serif"
+
+# Inline styles applied per tag for email client compatibility
+_TAG_STYLES = {
+    "h1": f"margin:0 0 16px 0; font-family:{_FONT}; font-size:24px; font-weight:700; color:#1a1a2e; line-height:1.3;",
+    "h2": f"margin:28px 0 12px 0; padding-bottom:8px; border-bottom:2px solid #e8e8e8; font-family:{_FONT}; font-size:20px; font-weight:700; color:#1a1a2e; line-height:1.3;",
+    "h3": "margin:20px 0 8px 0; font-family:Arial,Helvetica,sans-serif; font-size:16px; font-weight:700; color:#2d3436; line-height:1.4;",
+    "p": f"margin:0 0 16px 0; font-family:{_FONT}; font-size:16px; line-height:1.7; color:#2d3436;",
+    "a": "color:#0f3460; text-decoration:underline; text-underline-offset:2px;",
+    "strong": "color:#1a1a2e; font-weight:700;",
+    "ul": f"margin:0 0 16px 0; padding-left:20px; font-family:{_FONT}; font-size:16px; line-height:1.7; color:#2d3436;",
+    "li": "margin:0 0 8px 0; padding-left:4px;",
+    "blockquote": "margin:16px 0; padding:12px 20px; border-left:3px solid #0f3460; background-color:#f8f9fa; font-style:italic; color:#555;",
+}
+
+# <hr> becomes a table-based divider (not just a style attribute), so it is
+# swapped on the serialized string rather than in the DOM walk
+_HR_DIVIDER = (
+    '<table role="presentation" width="100%" cellpadding="0" cellspacing="0" '
+    'border="0" style="margin:24px 0;"><tr><td style="border-top:1px solid '
+    '#e8e8e8; height:1px; line-height:1px; font-size:1px;">&nbsp;</td></tr></table>'
+)
+_HR_RE = re.compile(r"<hr\s*/?>")
+
+# Renderer built once at import; mistune is several times faster than the
+# `markdown` package on briefing-size input. escape=False keeps raw HTML
+# passthrough, matching the old renderer's behavior.
+_MD = mistune.create_markdown(
+    escape=False,
+    plugins=["table", "strikethrough", "footnotes"],
+)
+
+# Static HTML shell for the briefing email; only the date line and body
+# vary per run, so the multi-KB literal is built once at import
+_HTML_SHELL = """\
+<!DOCTYPE html>
+<html lang="en" xmlns="http://www.w3.org/1999/xhtml">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<meta http-equiv="X-UA-Compatible" content="IE=edge">
+<title>Newsletter Briefing</title>
+<!--[if mso]>
+<style type="text/css">
+  body, table, td { font-family: Arial, Helvetica, sans-serif !important; }
+</style>
+<![endif]-->
+</head>
+<body style="margin:0; padding:0; background-color:#f4f4f7; -webkit-text-size-adjust:100%; -ms-text-size-adjust:100%;">
+
+<!-- Outer wrapper table -->
+<table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color:#f4f4f7;">
+<tr><td align="center" style="padding:24px 16px;">
+
+<!-- Inner content table (600px max) -->
+<table role="presentation" width="600" cellpadding="0" cellspacing="0" border="0" style="max-width:600px; width:100%; background-color:#ffffff; border-radius:8px; overflow:hidden; box-shadow:0 1px 3px rgba(0,0,0,0.08);">
+
+<!-- Header -->
+<tr>
+<td style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%); padding:32px 40px 28px 40px; text-align:left;">
+  <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
+  <tr>
+  <td>
+    <p style="margin:0 0 4px 0; font-family:Arial,Helvetica,sans-serif; font-size:11px; letter-spacing:2px; text-transform:uppercase; color:#7ec8e3; font-weight:600;">Newsletter Intelligence</p>
+    <h1 style="margin:0 0 8px 0; font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Helvetica,Arial,sans-serif; font-size:26px; font-weight:700; color:#ffffff; line-height:1.2;">Daily Briefing</h1>
+    <p style="margin:0; font-family:Arial,Helvetica,sans-serif; font-size:13px; color:#a8b2d1;">{{ date_str }}</p>
+  </td>
+  </tr>
+  </table>
+</td>
+</tr>
+
+<!-- Body content -->
+<tr>
+<td style="padding:32px 40px 16px 40px; font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Helvetica,Arial,sans-serif; font-size:16px; line-height:1.7; color:#2d3436;">
+{{ body_html }}
+</td>
+</tr>
+
+<!-- Divider -->
+<tr>
+<td style="padding:0 40px;">
+  <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
+  <tr><td style="border-top:1px solid #e8e8e8; height:1px; line-height:1px; font-size:1px;">&nbsp;</td></tr>
+  </table>
+</td>
+</tr>
+
+<!-- Footer -->
+<tr>
+<td style="padding:20px 40px 28px 40px; text-align:center;">
+  <p style="margin:0; font-family:Arial,Helvetica,sans-serif; font-size:12px; color:#999; line-height:1.5;">
+    Curated by Newsletter Intelligence Agent
+  </p>
+</td>
+</tr>
+
+</table>
+<!-- /Inner content table -->
+
+</td></tr>
+</table>
+<!-- /Outer wrapper table -->
+
+</body>
+</html>"""
+
+# Compiled once to bytecode at import; rendering beats str.format and the
+# environment is reusable if more templates grow here
+_HTML_TMPL = jinja2.Environment(autoescape=False, auto_reload=False).from_string(
+    _HTML_SHELL
+)
+
 
 def synthesize_briefing(
-    items: list[ExtractedItem], settings: Settings
+    items: list[ExtractedItem],
+    settings: Settings,
+    now: datetime | None = None,
 ) -> tuple[str, str]:
     """Produce a Markdown briefing from extracted newsletter items.
 
+    Args:
+        now: Run timestamp; the orchestrator passes one captured time so the
+             briefing and state records agree. Defaults to the current time.
+
     Returns:
         A tuple of (markdown_text, html_text).
     """
     if not items:
         md = _empty_briefing()
-        html = _md_to_html(md)
+        html = _md_to_html(md, now=now)
         return md, html
 
-    # Prioritize and cap items to avoid overwhelming synthesis
+    # Drop content duplicates (cross-posted newsletters), then prioritize
+    # and cap items to avoid overwhelming synthesis
+    items = _dedupe_by_content(items)
     items = _prioritize_items(items, settings.max_synthesis_items)
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
+    client = llm.get_client(settings.anthropic_api_key)
 
     # Build the items block for the prompt (truncate individual content)
     max_content_chars = 1500
@@ -73,13 +198,13 @@ def synthesize_briefing(
     if sources_md:
         md_text += "\n\n" + sources_md
 
-    html_text = _md_to_html(md_text)
+    html_text = _md_to_html(md_text, now=now)
     return md_text, html_text
 
 
-def build_subject() -> str:
+def build_subject(now: datetime | None = None) -> str:
     """Generate the email subject line for the briefing."""
-    now = datetime.now(timezone.utc)
+    now = now or datetime.now(timezone.utc)
     hour = now.hour
     period = "Morning" if hour < 14 else "Evening"
     date_str = now.strftime("%B %d, %Y")
@@ -89,6 +214,36 @@ def build_subject() -> str:
 # ── Internal helpers ─────────────────────────────────────────────────────────
 
 
+def _dedupe_by_content(items: list[ExtractedItem]) -> list[ExtractedItem]:
+    """Drop items whose content duplicates an earlier one.
+
+    Cross-posted newsletters arrive from different senders with identical
+    bodies; _build_sources_section only dedupes by email id, so they would
+    otherwise be paid for twice in the synthesis prompt. Hashing the first
+    512 chars with xxh3 is effectively free per item.
+    """
+    seen: set[int] = set()
+    deduped: list[ExtractedItem] = []
+    for item in items:
+        digest = xxhash.xxh3_64_intdigest(item.summary_text[:512].encode())
+        if digest in seen:
+            logger.debug(
+                "Dropping duplicate content from %s: %s",
+                item.source_name,
+                item.email_subject[:60],
+            )
+            continue
+        seen.add(digest)
+        deduped.append(item)
+    if len(deduped) < len(items):
+        logger.info(
+            "Content dedupe: %d of %d items dropped",
+            len(items) - len(deduped),
+            len(items),
+        )
+    return deduped
+
+
 def _prioritize_items(
     items: list[ExtractedItem], max_items: int
 ) -> list[ExtractedItem]:
@@ -107,168 +262,43 @@ def _prioritize_items(
     return sorted_items
 
 
-def _md_to_html(md_text: str) -> str:
+def _md_to_html(md_text: str, now: datetime | None = None) -> str:
     """Convert Markdown to a styled HTML email body.
 
     Uses inline styles and table-based layout for maximum compatibility
     across Gmail, Apple Mail, and Outlook.
     """
-    body_html = markdown.markdown(
-        md_text,
-        extensions=["extra", "smarty"],
-    )
+    body_html = _MD(md_text)
 
     # Inline-style the markdown-generated elements for Gmail compatibility
     body_html = _inline_styles(body_html)
 
-    now = datetime.now(timezone.utc)
+    now = now or datetime.now(timezone.utc)
     date_str = now.strftime("%A, %B %d, %Y")
-    year = now.strftime("%Y")
-
-    return f"""\
-<!DOCTYPE html>
-<html lang="en" xmlns="http://www.w3.org/1999/xhtml">
-<head>
-<meta charset="utf-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<meta http-equiv="X-UA-Compatible" content="IE=edge">
-<title>Newsletter Briefing</title>
-<!--[if mso]>
-<style type="text/css">
-  body, table, td {{ font-family: Arial, Helvetica, sans-serif !important; }}
-</style>
-<![endif]-->
-</head>
-<body style="margin:0; padding:0; background-color:#f4f4f7; -webkit-text-size-adjust:100%; -ms-text-size-adjust:100%;">
-
-<!-- Outer wrapper table -->
-<table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0" style="background-color:#f4f4f7;">
-<tr><td align="center" style="padding:24px 16px;">
-
-<!-- Inner content table (600px max) -->
-<table role="presentation" width="600" cellpadding="0" cellspacing="0" border="0" style="max-width:600px; width:100%; background-color:#ffffff; border-radius:8px; overflow:hidden; box-shadow:0 1px 3px rgba(0,0,0,0.08);">
-
-<!-- Header -->
-<tr>
-<td style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%); padding:32px 40px 28px 40px; text-align:left;">
-  <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
-  <tr>
-  <td>
-    <p style="margin:0 0 4px 0; font-family:Arial,Helvetica,sans-serif; font-size:11px; letter-spacing:2px; text-transform:uppercase; color:#7ec8e3; font-weight:600;">Newsletter Intelligence</p>
-    <h1 style="margin:0 0 8px 0; font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Helvetica,Arial,sans-serif; font-size:26px; font-weight:700; color:#ffffff; line-height:1.2;">Daily Briefing</h1>
-    <p style="margin:0; font-family:Arial,Helvetica,sans-serif; font-size:13px; color:#a8b2d1;">{date_str}</p>
-  </td>
-  </tr>
-  </table>
-</td>
-</tr>
-
-<!-- Body content -->
-<tr>
-<td style="padding:32px 40px 16px 40px; font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,Helvetica,Arial,sans-serif; font-size:16px; line-height:1.7; color:#2d3436;">
-{body_html}
-</td>
-</tr>
-
-<!-- Divider -->
-<tr>
-<td style="padding:0 40px;">
-  <table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0">
-  <tr><td style="border-top:1px solid #e8e8e8; height:1px; line-height:1px; font-size:1px;">&nbsp;</td></tr>
-  </table>
-</td>
-</tr>
-
-<!-- Footer -->
-<tr>
-<td style="padding:20px 40px 28px 40px; text-align:center;">
-  <p style="margin:0; font-family:Arial,Helvetica,sans-serif; font-size:12px; color:#999; line-height:1.5;">
-    Curated by Newsletter Intelligence Agent
-  </p>
-</td>
-</tr>
 
-</table>
-<!-- /Inner content table -->
-
-</td></tr>
-</table>
-<!-- /Outer wrapper table -->
-
-</body>
-</html>"""
+    return _HTML_TMPL.render(date_str=date_str, body_html=body_html)
 
 
 def _inline_styles(html: str) -> str:
-    """Add inline styles to HTML elements for email client compatibility."""
-    import re
-
-    FONT = "-apple-system,BlinkMacSystemFont,Segoe UI,Roboto,Helvetica,Arial,sans-serif"
-
-    # Section headers
-    html = re.sub(
-        r"<h1([^>]*)>",
-        lambda m: f'<h1{m.group(1)} style="margin:0 0 16px 0; font-family:{FONT}; font-size:24px; font-weight:700; color:#1a1a2e; line-height:1.3;">',
-        html,
-    )
-    html = re.sub(
-        r"<h2([^>]*)>",
-        lambda m: f'<h2{m.group(1)} style="margin:28px 0 12px 0; padding-bottom:8px; border-bottom:2px solid #e8e8e8; font-family:{FONT}; font-size:20px; font-weight:700; color:#1a1a2e; line-height:1.3;">',
-        html,
-    )
-    html = re.sub(
-        r"<h3([^>]*)>",
-        lambda m: f'<h3{m.group(1)} style="margin:20px 0 8px 0; font-family:Arial,Helvetica,sans-serif; font-size:16px; font-weight:700; color:#2d3436; line-height:1.4;">',
-        html,
-    )
-
-    # Paragraphs
-    html = re.sub(
-        r"<p([^>]*)>",
-        lambda m: f'<p{m.group(1)} style="margin:0 0 16px 0; font-family:{FONT}; font-size:16px; line-height:1.7; color:#2d3436;">',
-        html,
-    )
-
-    # Links
-    html = html.replace(
-        "<a ",
-        '<a style="color:#0f3460; text-decoration:underline; text-underline-offset:2px;" ',
-    )
+    """Add inline styles to HTML elements for email client compatibility.
 
-    # Bold text
-    html = re.sub(
-        r"<strong([^>]*)>",
-        lambda m: f'<strong{m.group(1)} style="color:#1a1a2e; font-weight:700;">',
-        html,
-    )
-
-    # Unordered lists
-    html = re.sub(
-        r"<ul([^>]*)>",
-        lambda m: f'<ul{m.group(1)} style="margin:0 0 16px 0; padding-left:20px; font-family:{FONT}; font-size:16px; line-height:1.7; color:#2d3436;">',
-        html,
-    )
-    html = re.sub(
-        r"<li([^>]*)>",
-        lambda m: f'<li{m.group(1)} style="margin:0 0 8px 0; padding-left:4px;">',
-        html,
-    )
-
-    # Blockquotes
-    html = re.sub(
-        r"<blockquote([^>]*)>",
-        lambda m: f'<blockquote{m.group(1)} style="margin:16px 0; padding:12px 20px; border-left:3px solid #0f3460; background-color:#f8f9fa; font-style:italic; color:#555;">',
-        html,
-    )
-
-    # Horizontal rules — styled as section dividers
-    html = re.sub(
-        r"<hr\s*/?>",
-        '<table role="presentation" width="100%" cellpadding="0" cellspacing="0" border="0" style="margin:24px 0;"><tr><td style="border-top:1px solid #e8e8e8; height:1px; line-height:1px; font-size:1px;">&nbsp;</td></tr></table>',
-        html,
-    )
-
-    return html
+    One DOM walk over the markdown output — each element gets its style from
+    the tag table — instead of a separate regex pass per tag.
+    """
+    root = lxml.html.fragment_fromstring(html, create_parent="div")
+    for el in root.iter():
+        style = _TAG_STYLES.get(el.tag)
+        if style is not None:
+            el.set("style", style)
+
+    serialized = lxml.html.tostring(root, encoding="unicode")
+    # Drop the wrapper <div> added for fragment parsing
+    serialized = serialized[serialized.index(">") + 1 : serialized.rindex("<")]
+
+    # Horizontal rules — styled as section dividers; skip the substitution
+    # entirely when the briefing has none
+    styled, count = _HR_RE.subn(_HR_DIVIDER, serialized)
+    return styled if count else serialized
 
 
 def _empty_briefing() -> str:
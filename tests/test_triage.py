@@ -0,0 +1,32 @@
+"""Tests for triage helpers that need no fixtures or network."""
+
+from newsletter_parser.triage import _normalize_sender
+
+
+def test_extracts_angle_bracketed_address():
+    assert (
+        _normalize_sender("Newsletter Name <Noreply@Example.com>")
+        == "noreply@example.com"
+    )
+
+
+def test_last_angle_bracketed_token_wins():
+    # Display names may themselves contain brackets; the address is always
+    # the last bracketed token in the header
+    assert _normalize_sender('"Deals <3" <real@example.com>') == "real@example.com"
+
+
+def test_mismatched_brackets_fall_through_to_whole_header():
+    assert (
+        _normalize_sender("Broken <no-close@example.com")
+        == "broken <no-close@example.com"
+    )
+    assert _normalize_sender("backwards> then <") == "backwards> then <"
+
+
+def test_plain_address_is_lowercased_and_stripped():
+    assert _normalize_sender("  User@Example.COM ") == "user@example.com"
+
+
+def test_empty_sender():
+    assert _normalize_sender("") == ""